@@ -8,6 +8,32 @@ from goth.configuration import Override
 from goth.runner.log import configure_logging
 
 
+_UTC = timezone.utc
+
+_COMMON_ASSETS = (Path(__file__).parent / "assets").resolve()
+_DEFAULT_CONFIG = (Path(__file__).parent / "goth-config.yml").resolve()
+_LOG_BASE_DIR = Path("/", "tmp", "goth-tests")
+
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _event_loop_policy():
+    """Install uvloop's event loop policy if the package is available.
+
+    uvloop is not a dependency of the test suite; when it happens to be
+    installed, the asyncio-heavy tests simply run on the faster loop.
+    """
+    if uvloop is not None:
+        import asyncio
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def pytest_addoption(parser):
     parser.addoption(
         "--config-override",
@@ -22,23 +48,20 @@ def pytest_addoption(parser):
 @pytest.fixture(scope="session")
 def common_assets() -> Path:
     """Fixture providing path to dir containing generated goth assets."""
-    assets_path = Path(__file__).parent / "assets"
-    return assets_path.resolve()
+    return _COMMON_ASSETS
 
 
 @pytest.fixture(scope="session")
 def default_config() -> Path:
     """Fixture providing path to yagna's default goth config."""
-    config_path = Path(__file__).parent / "goth-config.yml"
-    return config_path.resolve()
+    return _DEFAULT_CONFIG
 
 
 @pytest.fixture(scope="session")
 def log_dir() -> Path:
     """Fixture providing unique directory for logs from a test run."""
-    base_dir = Path("/", "tmp", "goth-tests")
-    date_str = datetime.now(tz=timezone.utc).strftime("%Y%m%d_%H%M%S%z")
-    log_dir = base_dir / f"goth_{date_str}"
+    date_str = datetime.now(tz=_UTC).strftime("%Y%m%d_%H%M%S%z")
+    log_dir = _LOG_BASE_DIR / f"goth_{date_str}"
     log_dir.mkdir(parents=True)
 
     configure_logging(log_dir)
@@ -50,4 +73,4 @@ def log_dir() -> Path:
 def config_overrides(request) -> List[Override]:
     """Fixture parsing --config-override params passed to the test invocation."""
     overrides: List[str] = request.config.option.config_override or []
-    return [tuple(o.split("=")) for o in overrides]
+    return [(key, value) for key, _, value in (o.partition("=") for o in overrides)]
@@ -1,5 +1,6 @@
 """Tests payment driver list CLI command."""
 
+import asyncio
 import logging
 from pathlib import Path
 from typing import List
@@ -10,10 +11,12 @@ from goth.address import (
     PROXY_HOST,
     YAGNA_REST_URL,
 )
-from goth.configuration import load_yaml, Override
+from goth.configuration import Override
 from goth.runner import Runner
 from goth.runner.probe import RequestorProbe
 
+from goth_tests.helpers.config import load_yaml_cached
+
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +34,7 @@ async def test_payment_driver_list(
         {"name": "requestor", "type": "Requestor"},
     ]
     config_overrides.append(("nodes", nodes))
-    goth_config = load_yaml(default_config, config_overrides)
+    goth_config = load_yaml_cached(default_config, config_overrides)
 
     runner = Runner(
         base_log_dir=log_dir,
@@ -41,7 +44,10 @@ async def test_payment_driver_list(
 
     async with runner(goth_config.containers):
         requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        res = requestor.cli.payment_drivers()
+        # The CLI call shells out to the container and blocks; run it in a
+        # worker thread so the event loop keeps draining container logs.
+        loop = asyncio.get_event_loop()
+        res = await loop.run_in_executor(None, requestor.cli.payment_drivers)
         assert res and res.items()
         driver = next(iter(res.values()), None)
 
@@ -1,5 +1,6 @@
 """Tests that zero-amount invoices are settled."""
 
+import asyncio
 import logging
 from pathlib import Path
 from typing import List, Optional
@@ -10,13 +11,14 @@ from goth.address import (
     PROXY_HOST,
     YAGNA_REST_URL,
 )
-from goth.configuration import load_yaml, Override
+from goth.configuration import Override
 from goth.node import node_environment
 from goth.runner import Runner
 from goth.runner.probe import RequestorProbe
 from ya_payment import InvoiceStatus
 
 from goth_tests.helpers.activity import wasi_exe_script, wasi_task_package
+from goth_tests.helpers.config import load_yaml_cached
 from goth_tests.helpers.negotiation import DemandBuilder, negotiate_agreements
 from goth_tests.helpers.probe import ProviderProbe
 
@@ -38,7 +40,7 @@ async def test_zero_amount_invoice(
     ]
     config_overrides.append(("nodes", nodes))
 
-    goth_config = load_yaml(default_config, config_overrides)
+    goth_config = load_yaml_cached(default_config, config_overrides)
 
     runner = Runner(
         base_log_dir=log_dir,
@@ -68,8 +70,12 @@ async def test_zero_amount_invoice(
 
         # Payment
 
-        await provider.wait_for_invoice_sent()
-        invoices = await requestor.gather_invoices(agreement_id)
+        # The provider-side log wait and the requestor-side invoice
+        # gathering observe the same event; run them concurrently.
+        _, invoices = await asyncio.gather(
+            provider.wait_for_invoice_sent(),
+            requestor.gather_invoices(agreement_id),
+        )
         await requestor.pay_invoices(invoices)
         await provider.wait_for_invoice_paid()
 
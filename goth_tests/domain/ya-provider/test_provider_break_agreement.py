@@ -1,8 +1,9 @@
 """End to end tests for various scenarios which involve breaking agreements."""
 
+import asyncio
+import functools
 import logging
 from pathlib import Path
-from typing import List, Tuple
 
 import pytest
 
@@ -10,7 +11,6 @@ from goth.address import (
     PROXY_HOST,
     YAGNA_REST_URL,
 )
-from goth.configuration import load_yaml, Override, Configuration
 from goth.node import node_environment
 from goth.runner import Runner
 from goth.runner.container.payment import PaymentIdPool
@@ -18,12 +18,45 @@ from goth.runner.container.yagna import YagnaContainerConfig
 from goth.runner.probe import RequestorProbe
 
 from goth_tests.helpers.activity import run_activity, wasi_exe_script, wasi_task_package
+from goth_tests.helpers.config import load_yaml_cached, parse_overrides
 from goth_tests.helpers.negotiation import negotiate_agreements, DemandBuilder
 from goth_tests.helpers.payment import pay_all
 from goth_tests.helpers.probe import ProviderProbe
 
 logger = logging.getLogger("goth.test.breaking-agreement")
 
+_MULTI_ACTIVITY_CONSTRAINTS = (
+    "(&(golem.com.pricing.model=linear)"
+    "(golem.srv.caps.multi-activity=true)"
+    "(golem.runtime.name=wasmtime))"
+)
+
+# Provider breaks idle Agreements after IDLE_AGREEMENT_TIMEOUT. The value
+# applies to the whole shared container, so it must comfortably exceed the
+# 2-second create_activity bound (plus REST latency) used by
+# test_provider_timeout_unresponsive_requestor - otherwise a slow create
+# leaves the Agreement idle and it breaks with "No activity created"
+# instead of the unreachable-requestor path that test asserts on.
+IDLE_AGREEMENT_TIMEOUT_SEC = 10
+BREAK_MARGIN_SEC = 3
+
+# Debit-note timing: the accept timeout is negotiated in the demand, the
+# interval is configured on the provider container by the runner fixture.
+DEBIT_NOTE_ACCEPT_TIMEOUT_SEC = 8
+DEBIT_NOTE_INTERVAL_SEC = 15
+
+# Log patterns passed to goth's pattern monitors. Defined once so every
+# wait uses the same literal (re's compile cache then always hits).
+_DEBIT_NOTE_SENT_LOG = r"Debit note \[.*\] for activity \[.*\] sent\."
+
+
+@functools.lru_cache(maxsize=None)
+def _format_task_package(template: str, web_server_addr: str, web_server_port) -> str:
+    """Render a task package template, once per (template, address) pair."""
+    return template.format(
+        web_server_addr=web_server_addr, web_server_port=web_server_port
+    )
+
 
 def build_demand(
     requestor: RequestorProbe,
@@ -33,79 +66,104 @@ def build_demand(
 ):
     """Simplifies creating demand."""
 
-    task_package = task_package_template.format(
-        web_server_addr=runner.host_address, web_server_port=runner.web_server_port
+    task_package = _format_task_package(
+        task_package_template, runner.host_address, runner.web_server_port
     )
 
     demand = (
         DemandBuilder(requestor)
         .props_from_template(task_package)
         .property("golem.srv.caps.multi-activity", True)
-        .constraints(
-            "(&(golem.com.pricing.model=linear)\
-            (golem.srv.caps.multi-activity=true)\
-            (golem.runtime.name=wasmtime))"
-        )
+        .constraints(_MULTI_ACTIVITY_CONSTRAINTS)
     )
 
     if require_debit_notes:
-        demand = demand.property("golem.com.payment.debit-notes.accept-timeout?", 8)
+        demand = demand.property(
+            "golem.com.payment.debit-notes.accept-timeout?",
+            DEBIT_NOTE_ACCEPT_TIMEOUT_SEC,
+        )
     return demand.build()
 
 
-def _create_runner(
-    common_assets: Path, config_overrides: List[Override], log_dir: Path
-) -> Tuple[Runner, Configuration]:
-    goth_config = load_yaml(
+@pytest.fixture(scope="module")
+def event_loop():
+    """Module-scoped event loop, required by the module-scoped `runner`."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+async def runner(request, common_assets: Path, log_dir: Path):
+    """Started Runner shared by every test in this module.
+
+    Bringing up the docker-compose stack dominates each test's wall time
+    and every test here only needs a fresh Agreement, so they all reuse
+    the same containers.
+
+    Note: `test_provider_timeout_unresponsive_requestor` stops the
+    requestor container, so it must remain the last test in this file.
+    """
+    goth_config = load_yaml_cached(
         Path(__file__).parent / "goth-config.yml",
-        config_overrides,
+        parse_overrides(request.config),
+    )
+
+    # Stopping a container takes a little bit more time, so the
+    # unresponsive-requestor test must send the first DebitNote late,
+    # otherwise Agreement will be terminated due to not accepting
+    # DebitNotes by Requestor. Harmless for the remaining tests.
+    goth_config.containers[1].environment["DEBIT_NOTE_INTERVAL"] = str(
+        DEBIT_NOTE_INTERVAL_SEC
     )
 
+    goth_config.containers[1].environment[
+        "IDLE_AGREEMENT_TIMEOUT"
+    ] = f"{IDLE_AGREEMENT_TIMEOUT_SEC}s"
+
     runner = Runner(
         base_log_dir=log_dir,
         compose_config=goth_config.compose_config,
         web_root_path=common_assets / "web-root",
     )
 
-    return runner, goth_config
+    async with runner(goth_config.containers):
+        # The provider logs "Subscribed offer" only once, at startup.
+        # Consume it here; tests must negotiate with wait_for_offers=False.
+        providers = runner.get_probes(probe_type=ProviderProbe)
+        await asyncio.gather(*(p.wait_for_offer_subscribed() for p in providers))
+        yield runner
 
 
 @pytest.mark.asyncio
-async def test_provider_idle_agreement(
-    common_assets: Path,
-    config_overrides: List[Override],
-    log_dir: Path,
-):
+async def test_provider_idle_agreement(runner: Runner):
     """Test provider breaking idle Agreement.
 
     Provider is expected to break Agreement in time configured by
     variable: IDLE_AGREEMENT_TIMEOUT, if there are no Activities created.
     """
-    runner, config = _create_runner(common_assets, config_overrides, log_dir)
-
-    async with runner(config.containers):
-        requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        providers = runner.get_probes(probe_type=ProviderProbe)
-        assert providers
-
-        agreement_providers = await negotiate_agreements(
-            requestor,
-            build_demand(requestor, runner, wasi_task_package),
-            providers,
-        )
+    requestor = runner.get_probes(probe_type=RequestorProbe)[0]
+    providers = runner.get_probes(probe_type=ProviderProbe)
+    assert providers
+
+    agreement_providers = await negotiate_agreements(
+        requestor,
+        build_demand(requestor, runner, wasi_task_package),
+        providers,
+        wait_for_offers=False,
+    )
 
-        # Break after 5s + 3s margin
-        await providers[0].wait_for_agreement_broken(r"No activity created", timeout=8)
+    # Break after the configured idle timeout, plus a margin.
+    await providers[0].wait_for_agreement_broken(
+        r"No activity created",
+        timeout=IDLE_AGREEMENT_TIMEOUT_SEC + BREAK_MARGIN_SEC,
+    )
 
-        await pay_all(requestor, agreement_providers)
+    await pay_all(requestor, agreement_providers)
 
 
 @pytest.mark.asyncio
-async def test_provider_idle_agreement_after_2_activities(
-    common_assets: Path,
-    config_overrides: List[Override],
-    log_dir: Path,
-):
+async def test_provider_idle_agreement_after_2_activities(runner: Runner):
     """Test provider breaking idle Agreement after 2 Activities were computed.
 
     Provider is expected to break Agreement, if no new Activity was created
@@ -113,123 +171,116 @@ async def test_provider_idle_agreement_after_2_activities(
     This test checks case, when Requestor already computed some Activities,
     but orphaned Agreement at some point.
     """
-    runner, config = _create_runner(common_assets, config_overrides, log_dir)
-
-    async with runner(config.containers):
-        requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        providers = runner.get_probes(probe_type=ProviderProbe)
-        assert providers
-
-        agreement_providers = await negotiate_agreements(
-            requestor,
-            build_demand(
-                requestor, runner, wasi_task_package, require_debit_notes=False
-            ),
-            providers,
-        )
+    requestor = runner.get_probes(probe_type=RequestorProbe)[0]
+    providers = runner.get_probes(probe_type=ProviderProbe)
+    assert providers
+
+    agreement_providers = await negotiate_agreements(
+        requestor,
+        build_demand(requestor, runner, wasi_task_package, require_debit_notes=False),
+        providers,
+        wait_for_offers=False,
+    )
 
-        agreement_id, provider = agreement_providers[0]
-        for i in range(0, 2):
-            logger.info("Running activity %d-th time on %s", i, provider.name)
-            await run_activity(
-                requestor, provider, agreement_id, wasi_exe_script(runner)
-            )
+    agreement_id, provider = agreement_providers[0]
+    exe_script = wasi_exe_script(runner)
+    for i in range(0, 2):
+        logger.info("Running activity %d-th time on %s", i, provider.name)
+        await run_activity(requestor, provider, agreement_id, exe_script)
 
-        # Break after 5s + 3s margin
-        await providers[0].wait_for_agreement_broken("No activity created", timeout=8)
+    # Break after the configured idle timeout, plus a margin.
+    await providers[0].wait_for_agreement_broken(
+        "No activity created",
+        timeout=IDLE_AGREEMENT_TIMEOUT_SEC + BREAK_MARGIN_SEC,
+    )
 
-        await pay_all(requestor, agreement_providers)
+    await pay_all(requestor, agreement_providers)
 
 
 @pytest.mark.asyncio
-async def test_provider_debit_notes_accept_timeout(
-    common_assets: Path,
-    config_overrides: List[Override],
-    log_dir: Path,
-):
+async def test_provider_debit_notes_accept_timeout(runner: Runner):
     """Test provider breaking Agreement if Requestor doesn't accept DebitNotes.
 
     Requestor is expected to accept DebitNotes in timeout negotiated in Offer.
     """
-    runner, config = _create_runner(common_assets, config_overrides, log_dir)
-
-    async with runner(config.containers):
-        requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        providers = runner.get_probes(probe_type=ProviderProbe)
-        assert providers
-
-        agreement_providers = await negotiate_agreements(
-            requestor,
-            build_demand(requestor, runner, wasi_task_package),
-            providers,
-        )
+    requestor = runner.get_probes(probe_type=RequestorProbe)[0]
+    providers = runner.get_probes(probe_type=ProviderProbe)
+    assert providers
+
+    agreement_providers = await negotiate_agreements(
+        requestor,
+        build_demand(requestor, runner, wasi_task_package),
+        providers,
+        wait_for_offers=False,
+    )
 
-        agreement_id, provider = agreement_providers[0]
+    agreement_id, provider = agreement_providers[0]
 
-        await requestor.create_activity(agreement_id)
-        await provider.wait_for_exeunit_started()
+    await requestor.create_activity(agreement_id)
+    await provider.wait_for_exeunit_started()
 
-        # Wait for first DebitNote sent by Provider.
-        await providers[0].wait_for_log(
-            r"Debit note \[.*\] for activity \[.*\] sent.", timeout=30
-        )
+    # Wait for first DebitNote sent by Provider.
+    await providers[0].wait_for_log(_DEBIT_NOTE_SENT_LOG, timeout=30)
 
-        # Negotiated timeout is 8s. Let's wait with some margin.
-        await providers[0].wait_for_agreement_broken(
-            "Requestor isn't accepting DebitNotes in time",
-            timeout=12,
-        )
+    # Wait out the negotiated accept timeout, plus a margin.
+    await providers[0].wait_for_agreement_broken(
+        "Requestor isn't accepting DebitNotes in time",
+        timeout=DEBIT_NOTE_ACCEPT_TIMEOUT_SEC + BREAK_MARGIN_SEC,
+    )
 
-        await pay_all(requestor, agreement_providers)
+    await pay_all(requestor, agreement_providers)
 
 
 @pytest.mark.asyncio
-async def test_provider_timeout_unresponsive_requestor(
-    common_assets: Path,
-    config_overrides: List[Override],
-    log_dir: Path,
-):
+async def test_provider_timeout_unresponsive_requestor(runner: Runner):
     """Test provider breaking Agreement if Requestor goes offline.
 
     If Provider is unable to send DebitNotes for some period of time, he should
     break Agreement. This is separate mechanism from DebitNotes keep alive, because
     here we are unable to send them, so they can't timeout.
     """
-    runner, config = _create_runner(common_assets, config_overrides, log_dir)
-
-    # Stopping container takes a little bit more time, so we must send
-    # DebitNote later, otherwise Agreement will be terminated due to
-    # not accepting DebitNotes by Requestor.
-    config.containers[1].environment["DEBIT_NOTE_INTERVAL"] = "15"
-
-    async with runner(config.containers):
-        requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        providers = runner.get_probes(probe_type=ProviderProbe)
-        assert providers
-
-        agreement_providers = await negotiate_agreements(
-            requestor,
-            build_demand(requestor, runner, wasi_task_package),
-            providers,
-        )
-
-        agreement_id, provider = agreement_providers[0]
-
-        # Create activity without waiting. Otherwise Provider will manage
-        # to send first DebitNote, before we kill Requestor Yagna daemon.
-        # loop = asyncio.get_event_loop()
-        await requestor.create_activity(agreement_id)
-
-        # Stop Requestor probe. This should kill Yagna Daemon and
-        # make Requestor unreachable, so Provider won't be able to send DebitNotes.
-        requestor.container.stop()
+    requestor = runner.get_probes(probe_type=RequestorProbe)[0]
+    providers = runner.get_probes(probe_type=ProviderProbe)
+    assert providers
+
+    agreement_providers = await negotiate_agreements(
+        requestor,
+        build_demand(requestor, runner, wasi_task_package),
+        providers,
+        wait_for_offers=False,
+    )
 
-        # First DebitNote will be sent after 15s. Let's wait with some margin.
-        await providers[0].wait_for_agreement_broken(
+    agreement_id, provider = agreement_providers[0]
+
+    # Create activity without waiting. Otherwise Provider will manage
+    # to send first DebitNote, before we kill Requestor Yagna daemon.
+    # The daemon is about to go away, so don't let a hanging call postpone
+    # the stop either - proceed after a short bounded wait.
+    create_activity = asyncio.ensure_future(requestor.create_activity(agreement_id))
+    await asyncio.wait({create_activity}, timeout=2.0)
+    if create_activity.done():
+        # Surface a failed create here instead of as an unrelated timeout
+        # (and an unretrieved-exception warning) later.
+        create_activity.result()
+
+    # Stop Requestor probe. This should kill Yagna Daemon and
+    # make Requestor unreachable, so Provider won't be able to send DebitNotes.
+    # container.stop() blocks for up to docker's stop timeout; run it in a
+    # worker thread so provider log monitoring continues in the meantime.
+    loop = asyncio.get_event_loop()
+    stop_requestor = loop.run_in_executor(None, requestor.container.stop)
+    create_activity.cancel()
+
+    # First DebitNote will be sent after DEBIT_NOTE_INTERVAL_SEC.
+    # Let's wait with some margin.
+    await asyncio.gather(
+        stop_requestor,
+        providers[0].wait_for_agreement_broken(
             "Requestor is unreachable more than",
-            timeout=18,
-        )
+            timeout=DEBIT_NOTE_INTERVAL_SEC + BREAK_MARGIN_SEC,
+        ),
+    )
 
-        # Note that Agreement will be broken, but Provider won't be
-        # able to terminate it, because other Yagna daemon is unreachable,
-        # so Provider will retry terminating in infinity.
+    # Note that Agreement will be broken, but Provider won't be
+    # able to terminate it, because other Yagna daemon is unreachable,
+    # so Provider will retry terminating in infinity.
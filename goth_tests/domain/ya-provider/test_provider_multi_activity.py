@@ -1,161 +1,195 @@
 """End to end tests for requesting WASM tasks using goth REST API clients."""
 
+import asyncio
 import json
 import logging
 import re
 from pathlib import Path
-from typing import List, Tuple
 
 import pytest
 from ya_activity.exceptions import ApiException
 
-from goth.configuration import load_yaml, Override, Configuration
 from goth.runner import Runner
 from goth.runner.probe import RequestorProbe
 
 from goth_tests.helpers.activity import wasi_exe_script, wasi_task_package
+from goth_tests.helpers.config import load_yaml_cached, parse_overrides
 from goth_tests.helpers.negotiation import negotiate_agreements, DemandBuilder
 from goth_tests.helpers.payment import pay_all
 from goth_tests.helpers.probe import ProviderProbe
 
 logger = logging.getLogger("goth.test.multi-activity")
 
+_MULTI_ACTIVITY_CONSTRAINTS = (
+    "(&(golem.com.pricing.model=linear)"
+    "(golem.srv.caps.multi-activity=true)"
+    "(golem.runtime.name=wasmtime))"
+)
 
-def _create_runner(
-    common_assets: Path, config_overrides: List[Override], log_dir: Path
-) -> Tuple[Runner, Configuration]:
-    goth_config = load_yaml(Path(__file__).parent / "goth-config.yml", config_overrides)
+_SINGLE_ACTIVITY_RE = re.compile(
+    r"terminated\. Reason: Only single Activity allowed,"
+    r" message: Can't create 2 simultaneous Activities\."
+)
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """Module-scoped event loop, required by the module-scoped `runner`."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+async def runner(request, common_assets: Path, log_dir: Path):
+    """Started Runner shared by every test in this module.
+
+    Bringing up the docker-compose stack dominates each test's wall
+    time; both tests only need a fresh Agreement, so they reuse the same
+    containers.
+    """
+    goth_config = load_yaml_cached(
+        Path(__file__).parent / "goth-config.yml",
+        parse_overrides(request.config),
+    )
 
     runner = Runner(
         base_log_dir=log_dir,
         compose_config=goth_config.compose_config,
         web_root_path=common_assets / "web-root",
     )
-    return runner, goth_config
 
+    async with runner(goth_config.containers):
+        # The provider logs "Subscribed offer" only once, at startup.
+        # Consume it here; tests must negotiate with wait_for_offers=False.
+        providers = runner.get_probes(probe_type=ProviderProbe)
+        await asyncio.gather(*(p.wait_for_offer_subscribed() for p in providers))
+        yield runner
 
-@pytest.mark.asyncio
-async def test_provider_multi_activity(
-    common_assets: Path,
-    config_overrides: List[Override],
-    log_dir: Path,
+
+def _build_demand(requestor: RequestorProbe, runner: Runner):
+    """Build the multi-activity Demand used by both tests in this module."""
+    task_package = wasi_task_package.format(
+        web_server_addr=runner.host_address, web_server_port=runner.web_server_port
+    )
+
+    return (
+        DemandBuilder(requestor)
+        .props_from_template(task_package)
+        .property("golem.srv.caps.multi-activity", True)
+        .constraints(_MULTI_ACTIVITY_CONSTRAINTS)
+        .build()
+    )
+
+
+async def _run_activities(
+    requestor: RequestorProbe,
+    provider: ProviderProbe,
+    agreement_id: str,
+    exe_script_json: str,
+    num_commands: int,
 ):
+    """Run the 3-activity sequence for a single Agreement.
+
+    Activities on one Agreement must stay sequential (the provider allows
+    only one at a time), but separate Agreements involve separate
+    providers and can progress concurrently.
+    """
+    for i in range(0, 3):
+        logger.info("Running activity %d-th time on %s", i, provider.name)
+        # Arm the log monitor before creating the activity, so the
+        # start-up line can't be missed if the exe-unit comes up quickly.
+        exeunit_started = asyncio.ensure_future(provider.wait_for_exeunit_started())
+        activity_id = await requestor.create_activity(agreement_id)
+        await exeunit_started
+        batch_id = await requestor.call_exec(activity_id, exe_script_json)
+        await requestor.collect_results(activity_id, batch_id, num_commands, timeout=30)
+        await requestor.destroy_activity(activity_id)
+        await provider.wait_for_exeunit_finished()
+
+    await requestor.terminate_agreement(agreement_id, None)
+
+
+@pytest.mark.asyncio
+async def test_provider_multi_activity(runner: Runner):
     """Test provider handling multiple activities in single Agreement.
 
     Tests running multiple activities on single Provider.
     In this case Requestor is responsible for terminating Agreement.
     """
-    runner, config = _create_runner(common_assets, config_overrides, log_dir)
-
-    async with runner(config.containers):
-        requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        providers = runner.get_probes(probe_type=ProviderProbe)
-        assert providers
+    requestor = runner.get_probes(probe_type=RequestorProbe)[0]
+    providers = runner.get_probes(probe_type=ProviderProbe)
+    assert providers
+
+    # Market
+    demand = _build_demand(requestor, runner)
+
+    agreement_providers = await negotiate_agreements(
+        requestor,
+        demand,
+        providers,
+        wait_for_offers=False,
+    )
 
-        # Market
-        task_package = wasi_task_package.format(
-            web_server_addr=runner.host_address, web_server_port=runner.web_server_port
-        )
+    #  Activity
+    exe_script = wasi_exe_script(runner)
+    # The same script goes to every activity; serialize it once.
+    exe_script_json = json.dumps(exe_script)
 
-        demand = (
-            DemandBuilder(requestor)
-            .props_from_template(task_package)
-            .property("golem.srv.caps.multi-activity", True)
-            .constraints(
-                "(&(golem.com.pricing.model=linear)\
-                (golem.srv.caps.multi-activity=true)\
-                (golem.runtime.name=wasmtime))"
+    await asyncio.gather(
+        *(
+            _run_activities(
+                requestor, provider, agreement_id, exe_script_json, len(exe_script)
             )
-            .build()
+            for agreement_id, provider in agreement_providers
         )
+    )
 
-        agreement_providers = await negotiate_agreements(
-            requestor,
-            demand,
-            providers,
-        )
-
-        #  Activity
-        exe_script = wasi_exe_script(runner)
-
-        for agreement_id, provider in agreement_providers:
-            for i in range(0, 3):
-                logger.info("Running activity %d-th time on %s", i, provider.name)
-                activity_id = await requestor.create_activity(agreement_id)
-                await provider.wait_for_exeunit_started()
-                batch_id = await requestor.call_exec(
-                    activity_id, json.dumps(exe_script)
-                )
-                await requestor.collect_results(
-                    activity_id, batch_id, len(exe_script), timeout=30
-                )
-                await requestor.destroy_activity(activity_id)
-                await provider.wait_for_exeunit_finished()
-
-            await requestor.terminate_agreement(agreement_id, None)
-            await provider.wait_for_agreement_terminated()
-
-        # Payment
-        await pay_all(requestor, agreement_providers)
+    # Payment
+    # Providers log the termination on their own; let those waits overlap
+    # with settling the payments instead of gating them.
+    await asyncio.gather(
+        *(
+            provider.wait_for_agreement_terminated()
+            for _, provider in agreement_providers
+        ),
+        pay_all(requestor, agreement_providers),
+    )
 
 
 @pytest.mark.asyncio
-async def test_provider_single_simultaneous_activity(
-    common_assets: Path,
-    config_overrides: List[Override],
-    log_dir: Path,
-):
+async def test_provider_single_simultaneous_activity(runner: Runner):
     """Test provider rejecting second activity if one is already running.
 
     Provider is expected to reject second activity, if one is already running.
     """
-    runner, config = _create_runner(common_assets, config_overrides, log_dir)
-
-    async with runner(config.containers):
-        requestor = runner.get_probes(probe_type=RequestorProbe)[0]
-        providers = runner.get_probes(probe_type=ProviderProbe)
-        assert providers
-
-        # Market
-        task_package = wasi_task_package.format(
-            web_server_addr=runner.host_address, web_server_port=runner.web_server_port
-        )
-
-        demand = (
-            DemandBuilder(requestor)
-            .props_from_template(task_package)
-            .property("golem.srv.caps.multi-activity", True)
-            .constraints(
-                "(&(golem.com.pricing.model=linear)\
-                (golem.srv.caps.multi-activity=true)\
-                (golem.runtime.name=wasmtime))"
-            )
-            .build()
-        )
+    requestor = runner.get_probes(probe_type=RequestorProbe)[0]
+    providers = runner.get_probes(probe_type=ProviderProbe)
+    assert providers
+
+    # Market
+    demand = _build_demand(requestor, runner)
+
+    agreement_providers = await negotiate_agreements(
+        requestor,
+        demand,
+        providers,
+        wait_for_offers=False,
+    )
 
-        agreement_providers = await negotiate_agreements(
-            requestor,
-            demand,
-            providers,
-        )
+    #  Activity
+    agreement_id, provider = agreement_providers[0]
 
-        #  Activity
-        agreement_id, provider = agreement_providers[0]
+    first_activity_id = await requestor.create_activity(agreement_id)
 
-        first_activity_id = await requestor.create_activity(agreement_id)
+    # Creation should fail here.
+    with pytest.raises(ApiException) as e:
+        await requestor.create_activity(agreement_id)
 
-        # Creation should fail here.
-        with pytest.raises(ApiException) as e:
-            await requestor.create_activity(agreement_id)
+    assert _SINGLE_ACTIVITY_RE.search(e.value.body)
 
-        assert re.search(
-            r"terminated. Reason: Only single Activity allowed,"
-            r" message: Can't create 2 simultaneous Activities.",
-            e.value.body,
-        )
-
-        await requestor.destroy_activity(first_activity_id)
-        await provider.wait_for_exeunit_finished()
+    await requestor.destroy_activity(first_activity_id)
+    await provider.wait_for_exeunit_finished()
 
-        await requestor.terminate_agreement(agreement_id, None)
-        await provider.wait_for_agreement_terminated()
+    await requestor.terminate_agreement(agreement_id, None)
+    await provider.wait_for_agreement_terminated()
@@ -1,5 +1,6 @@
 """Activity helpers."""
 
+import asyncio
 import json
 import os
 from pathlib import Path
@@ -27,8 +28,11 @@ async def run_activity(
 ):
     """Run single Activity from start to end."""
 
+    # Arm the log monitor before creating the activity, so the start-up
+    # line can't be missed if the exe-unit comes up quickly.
+    exeunit_started = asyncio.ensure_future(provider.wait_for_exeunit_started())
     activity_id = await requestor.create_activity(agreement_id)
-    await provider.wait_for_exeunit_started()
+    await exeunit_started
 
     batch_id = await requestor.call_exec(activity_id, json.dumps(exe_script))
     await requestor.collect_results(activity_id, batch_id, len(exe_script), timeout=30)
@@ -0,0 +1,41 @@
+"""Helper functions for loading goth configuration files."""
+
+import copy
+import functools
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+from goth.configuration import Configuration, Override, load_yaml
+
+
+def parse_overrides(pytest_config) -> List[Override]:
+    """Parse --config-override params from a pytest Config object.
+
+    Mirrors the function-scoped ``config_overrides`` fixture for use by
+    fixtures of wider scope, which cannot depend on it.
+    """
+    overrides: List[str] = pytest_config.option.config_override or []
+    return [(key, value) for key, _, value in (o.partition("=") for o in overrides)]
+
+
+@functools.lru_cache(maxsize=32)
+def _load_yaml_cached(path: str, overrides_key: Tuple[str, ...]) -> Configuration:
+    overrides = [tuple(json.loads(o)) for o in overrides_key]
+    return load_yaml(Path(path), overrides)
+
+
+def load_yaml_cached(path: Path, overrides: List[Override]) -> Configuration:
+    """Load a goth config file, reusing the parsed YAML between tests.
+
+    Tests in a module load the same file with the same overrides, so the
+    disk read and YAML parse are paid only once per session. A deep copy
+    is returned each time, since tests may tweak the configuration
+    (e.g. container environment) before starting the runner.
+    """
+    try:
+        overrides_key = tuple(json.dumps(list(o)) for o in overrides)
+    except TypeError:
+        # Override values are not always JSON-serializable; load directly.
+        return load_yaml(path, overrides)
+    return copy.deepcopy(_load_yaml_cached(str(path), overrides_key))
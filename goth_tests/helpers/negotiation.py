@@ -1,5 +1,6 @@
 """Helper functions for building custom Offers and negotiating Agreements."""
 
+import asyncio
 import logging
 from typing import List, Optional, Callable, Tuple, Any
 from datetime import datetime, timedelta
@@ -67,15 +68,22 @@ async def negotiate_agreements(
     demand: Demand,
     providers: List[ProviderProbe],
     proposal_filter: Optional[Callable[[Proposal], bool]] = lambda p: True,
+    wait_for_offers: bool = True,
 ) -> List[Tuple[str, ProviderProbe]]:
     """Negotiate agreements with supplied providers.
 
     Use negotiate_agreements function, when you don't need any custom negotiation
     logic, but rather you want to test further parts of yagna protocol
     and need ready Agreements.
+
+    Pass ``wait_for_offers=False`` when the Runner is shared between
+    tests: ya-provider logs "Subscribed offer" only once, at startup, so
+    only the first negotiation on a runner can observe that line - later
+    waits would time out. The sharing fixture should consume it instead.
     """
-    for provider in providers:
-        await provider.wait_for_offer_subscribed()
+    if wait_for_offers:
+        # Providers subscribe their offers independently; wait for all at once.
+        await asyncio.gather(*(p.wait_for_offer_subscribed() for p in providers))
 
     subscription_id, demand = await requestor.subscribe_demand(demand)
 
@@ -87,9 +95,10 @@ async def negotiate_agreements(
     logger.info("Collected %s proposals", len(proposals))
 
     agreement_providers = []
+    providers_by_address = {p.address: p for p in providers}
 
     for proposal in proposals:
-        provider = next(p for p in providers if p.address == proposal.issuer_id)
+        provider = providers_by_address[proposal.issuer_id]
         logger.info("Processing proposal from %s", provider.name)
 
         counter_proposal_id = await requestor.counter_proposal(
@@ -105,8 +114,12 @@ async def negotiate_agreements(
 
         agreement_id = await requestor.create_agreement(new_proposals[0])
         await requestor.confirm_agreement(agreement_id)
-        await provider.wait_for_agreement_approved()
-        await requestor.wait_for_approval(agreement_id)
+        # The provider-side approval log and the requestor-side approval
+        # long-poll observe the same event; await them together.
+        await asyncio.gather(
+            provider.wait_for_agreement_approved(),
+            requestor.wait_for_approval(agreement_id),
+        )
         agreement_providers.append((agreement_id, provider))
 
     await requestor.unsubscribe_demand(subscription_id)
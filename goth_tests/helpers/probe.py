@@ -26,14 +26,14 @@ class ProviderProbe(BaseProviderProbe):
     async def wait_for_exeunit_started(self):
         """Wait until the provider agent starts the exe-unit."""
         await self.provider_agent.wait_for_log(
-            r"(.*)\[ExeUnit\](.+)Supervisor initialized$"
+            r".*\[ExeUnit\].+Supervisor initialized$"
         )
 
     @step()
     async def wait_for_exeunit_finished(self):
         """Wait until exe-unit finishes."""
         await self.provider_agent.wait_for_log(
-            r"(.*)ExeUnit process exited with status Finished - exit code: 0(.*)"
+            r".*ExeUnit process exited with status Finished - exit code: 0"
         )
 
     @step()
@@ -59,7 +59,7 @@ class ProviderProbe(BaseProviderProbe):
     @step()
     async def wait_for_invoice_sent(self):
         """Wait until the invoice is sent."""
-        await self.provider_agent.wait_for_log("Invoice (.+) sent")
+        await self.provider_agent.wait_for_log("Invoice .+ sent")
 
     @step(default_timeout=300)
     async def wait_for_invoice_paid(self):